@@ -22,7 +22,6 @@ from fastapi.responses import JSONResponse, FileResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import pandas as pd
 import json
 import uuid
 import shutil
@@ -33,9 +32,8 @@ from server.utils import SessionLocal, check_and_initialize_db, get_db
 from sqlalchemy import func
 from dotenv import load_dotenv, find_dotenv
 from db.init_db import initialize_database
-from dataherd.data_processor import DataProcessor
-from dataherd.rule_manager import RuleManager
-from dataherd.report_generator import ReportGenerator
+# dataherd components are imported inside the endpoints that use them so that
+# creating the app does not load pandas, the NLP stack and the report builder
 # from dataherd.langgraph_workflow import create_dataherd_workflow  # Temporarily disabled
 
 load_dotenv(find_dotenv())
@@ -206,6 +204,7 @@ def mount_app_routes(app: FastAPI):
         Main data cleaning endpoint that processes cattle data based on natural language rules.
         """
         try:
+            from dataherd.data_processor import DataProcessor
             data_processor = DataProcessor()
             # In a real scenario, you would load data, apply rules, and save results
             # For now, this is a placeholder for the actual cleaning logic.
@@ -228,6 +227,7 @@ def mount_app_routes(app: FastAPI):
         Previews the data cleaning operation based on natural language rules.
         """
         try:
+            from dataherd.data_processor import DataProcessor
             data_processor = DataProcessor()
             # Placeholder for preview functionality
             return {
@@ -249,6 +249,7 @@ def mount_app_routes(app: FastAPI):
         Rolls back a specific data cleaning operation.
         """
         try:
+            from dataherd.data_processor import DataProcessor
             data_processor = DataProcessor()
             return {
                 "status": 200,
@@ -268,6 +269,7 @@ def mount_app_routes(app: FastAPI):
         Saves a new cleaning rule, optionally marking it as permanent.
         """
         try:
+            from dataherd.rule_manager import RuleManager
             rule_manager = RuleManager()
             return {
                 "status": 200,
@@ -288,6 +290,7 @@ def mount_app_routes(app: FastAPI):
         Updates an existing permanent cleaning rule.
         """
         try:
+            from dataherd.rule_manager import RuleManager
             rule_manager = RuleManager()
             return {
                 "status": 200,
@@ -307,6 +310,7 @@ def mount_app_routes(app: FastAPI):
         Retrieves all cleaning rules associated with a given client.
         """
         try:
+            from dataherd.rule_manager import RuleManager
             rule_manager = RuleManager()
             return {
                 "status": 200, 
@@ -325,6 +329,7 @@ def mount_app_routes(app: FastAPI):
         Generates a detailed report of data cleaning operations based on provided filters.
         """
         try:
+            from dataherd.report_generator import ReportGenerator
             report_generator = ReportGenerator()
             return {
                 "status": 200,
@@ -344,14 +349,16 @@ def mount_app_routes(app: FastAPI):
     # @app.post("/api/workflow_test", tags=["LangGraph Workflow"])
 
 
-def run_api(host, port):
+def run_api(host, port, workers=1):
     # 初始化数据库
     initialize_database()
 
-    # 启动服务
-    uvicorn.run(create_app(),
+    # 启动服务（以工厂导入字符串传入，每个 worker 进程各自创建应用）
+    uvicorn.run("api_server.api_router:create_app",
+                factory=True,
                 host=host,
                 port=port,
+                workers=workers,
                 )
 
 
@@ -359,8 +366,9 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument("--host", type=str, default="0.0.0.0")
     parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--workers", type=int, default=1)
 
     args = parser.parse_args()
 
-    run_api(host=args.host, port=args.port)
+    run_api(host=args.host, port=args.port, workers=args.workers)
 
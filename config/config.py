@@ -4,7 +4,6 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.exc import OperationalError
 from dotenv import load_dotenv
-import openai
 
 # Load environment variables
 load_dotenv()
@@ -88,6 +87,10 @@ def get_openai_client():
             print("Warning: OPENAI_API_KEY not found in environment variables")
             return None
         
+        # Imported here so that modules which only need the database settings
+        # do not pay for loading the OpenAI SDK
+        import openai
+        
         # Configure OpenAI client
         client = openai.OpenAI(api_key=api_key)
         
@@ -0,0 +1,47 @@
+"""
+Shared pytest fixtures for the DataHerd test suite
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Run the suite against a private in-memory database; this must be set before
+# db.base is imported because the engine is built at import time
+os.environ["DATABASE_URL"] = "sqlite://"
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from db.base import Base, engine, SessionLocal
+import db.models  # noqa: F401  (registers the tables on Base.metadata)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Create the schema once for the whole test session"""
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture(scope="module")
+def db_session(database):
+    """
+    Session bound to an outer transaction that is rolled back after the module
+
+    Commits made through the session stay inside the outer transaction, so
+    tests in the module share the pooled connection without leaving rows
+    behind for other modules.
+    """
+    connection = database.connect()
+    transaction = connection.begin()
+    session = SessionLocal(bind=connection)
+
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
@@ -10,10 +10,29 @@ and report generation capabilities.
 __version__ = "1.0.0"
 __author__ = "DataHerd Team"
 
-from .nlp_processor import NLPProcessor, ParsedRule, RuleType
-from .data_processor import DataProcessor
-from .rule_manager import RuleManager
-from .report_generator import ReportGenerator
+import importlib
+
+# Submodules are imported on first attribute access so that importing one
+# component (e.g. dataherd.rule_manager) does not load pandas, OpenAI and
+# the rest of the package as a side effect
+_LAZY_IMPORTS = {
+    'NLPProcessor': '.nlp_processor',
+    'ParsedRule': '.nlp_processor',
+    'RuleType': '.nlp_processor',
+    'DataProcessor': '.data_processor',
+    'RuleManager': '.rule_manager',
+    'ReportGenerator': '.report_generator',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'NLPProcessor',
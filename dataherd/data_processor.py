@@ -8,19 +8,24 @@ for cattle data management.
 
 import pandas as pd
 import numpy as np
-import json
 import logging
 import uuid
-from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 import tempfile
 import os
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # optional: CSV files are parsed by pandas without it
+    pa = pa_csv = None
+
 from .nlp_processor import NLPProcessor, ParsedRule
 from .rule_manager import RuleManager
 from db.models import CattleRecord, BatchInfo, OperationLog
 from db.base import SessionLocal
+from db.bulk import CATTLE_RECORD_COLUMNS, bulk_copy_records
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,45 +42,60 @@ class DataProcessor:
         self.data_cache = {}  # Cache for loaded data
         self.backup_cache = {}  # Cache for data backups
     
-    def load_data(self, file_path: str, batch_id: str) -> Dict[str, Any]:
+    def load_data(self, file_path: str, batch_id: str, batch_size: int = 10_000) -> Dict[str, Any]:
         """
         Load data from file and store in database
         
         Args:
             file_path: Path to the data file (CSV, Excel)
             batch_id: Unique identifier for the batch
+            batch_size: Number of rows read and written to the database per chunk
             
         Returns:
             Dictionary with loading results
         """
         try:
-            # Load data based on file type
+            # Load data based on file type; CSV files are read in chunks so each
+            # chunk can be written to the database as one bulk insert
             if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
+                chunks = self._read_csv_chunks(file_path, batch_size)
             elif file_path.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path)
+                return self.load_dataframe(pd.read_excel(file_path), batch_id, batch_size, source=file_path)
             else:
                 raise ValueError(f"Unsupported file type: {file_path}")
             
-            # Validate data structure
-            required_columns = ['lot_id', 'weight', 'breed', 'birth_date', 'health_status']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                raise ValueError(f"Missing required columns: {missing_columns}")
-            
-            # Store data in cache
-            self.data_cache[batch_id] = df.copy()
-            
-            # Save batch info to database
-            self._save_batch_info(batch_id, file_path, len(df))
+            return self._load_chunks(chunks, batch_id, file_path)
             
+        except Exception as e:
+            logger.error(f"Data loading failed: {e}")
             return {
-                'status': 'success',
+                'status': 'error',
                 'batch_id': batch_id,
-                'record_count': len(df),
-                'columns': list(df.columns),
-                'message': f"Data loaded successfully: {len(df)} records"
+                'message': f"Data loading failed: {str(e)}"
             }
+    
+    def load_dataframe(self, df: pd.DataFrame, batch_id: str, batch_size: int = 10_000,
+                       source: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Load an in-memory DataFrame and store it in database
+        
+        Callers that already hold the data as a DataFrame should use this
+        instead of writing it to a file for load_data to parse again.
+        
+        Args:
+            df: Cattle data with the same columns as an uploaded file
+            batch_id: Unique identifier for the batch
+            batch_size: Number of rows written to the database per chunk
+            source: Optional description of where the data came from, stored
+                as the batch's file path
+            
+        Returns:
+            Dictionary with loading results
+        """
+        try:
+            chunks = (df.iloc[start:start + batch_size]
+                      for start in range(0, max(len(df), 1), batch_size))
+            return self._load_chunks(chunks, batch_id, source)
             
         except Exception as e:
             logger.error(f"Data loading failed: {e}")
@@ -85,6 +105,95 @@ class DataProcessor:
                 'message': f"Data loading failed: {str(e)}"
             }
     
+    def _read_csv_chunks(self, file_path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Read a CSV file as DataFrames of at most batch_size rows
+        
+        When pyarrow is installed the file is parsed by its multithreaded
+        streaming reader one block at a time; otherwise pandas reads it in
+        chunks. Empty fields become missing values in both cases.
+        
+        The streaming reader fixes each column's type from the first block, so
+        a lot ID such as 'LOTX' or a weight such as 'abc' after a block of
+        numbers would fail the load midway. Every column is therefore read as
+        text and converted per chunk the way pandas does, leaving dirty values
+        for _save_records to coerce.
+        """
+        if pa_csv is None:
+            yield from pd.read_csv(file_path, chunksize=batch_size)
+            return
+        
+        read_options = pa_csv.ReadOptions(block_size=1 << 20)
+        
+        # A first reader only supplies the header, so every column can be typed
+        probe = pa_csv.open_csv(file_path, read_options=read_options)
+        columns = probe.schema.names
+        probe.close()
+        
+        reader = pa_csv.open_csv(
+            file_path,
+            read_options=read_options,
+            convert_options=pa_csv.ConvertOptions(
+                column_types={column: pa.string() for column in columns},
+                strings_can_be_null=True
+            )
+        )
+        has_rows = False
+        for record_batch in reader:
+            for start in range(0, record_batch.num_rows, batch_size):
+                has_rows = True
+                yield record_batch.slice(start, batch_size).to_pandas().apply(self._numeric_if_clean)
+        
+        # A header-only file still yields one empty chunk so its columns are checked
+        if not has_rows:
+            yield pd.DataFrame(columns=columns)
+    
+    def _numeric_if_clean(self, column: pd.Series) -> pd.Series:
+        """Convert a text column to numbers when every value parses, as pandas' CSV reader does"""
+        converted = pd.to_numeric(column, errors='coerce')
+        return converted if converted.notna().sum() == column.notna().sum() else column
+    
+    def _load_chunks(self, chunks: Iterable[pd.DataFrame], batch_id: str,
+                     source: Optional[str]) -> Dict[str, Any]:
+        """
+        Validate and store chunks of a batch, then cache the whole batch
+        
+        The records and the batch row are written in one transaction, so a
+        load that fails partway, or repeats an existing batch_id, leaves no
+        rows behind; the error propagates to the caller.
+        """
+        # Validate data structure
+        required_columns = ['lot_id', 'weight', 'breed', 'birth_date', 'health_status']
+        loaded_chunks = []
+        with SessionLocal() as session:
+            for chunk in chunks:
+                if not loaded_chunks:
+                    missing_columns = [col for col in required_columns if col not in chunk.columns]
+                    if missing_columns:
+                        raise ValueError(f"Missing required columns: {missing_columns}")
+                
+                self._save_records(session, batch_id, chunk)
+                loaded_chunks.append(chunk)
+            
+            if not loaded_chunks:
+                raise ValueError("No data found to load")
+            df = pd.concat(loaded_chunks, ignore_index=True)
+            
+            # Save batch info to database
+            session.add(BatchInfo(batch_id=batch_id, file_path=source, record_count=len(df)))
+            session.commit()
+        
+        # Store data in cache
+        self.data_cache[batch_id] = df.copy()
+        
+        return {
+            'status': 'success',
+            'batch_id': batch_id,
+            'record_count': len(df),
+            'columns': list(df.columns),
+            'message': f"Data loaded successfully: {len(df)} records"
+        }
+    
     def preview_cleaning_operation(self, batch_id: str, rule_text: str, 
                                  client_name: str = "") -> Dict[str, Any]:
         """
@@ -403,20 +512,21 @@ class DataProcessor:
         if batch_id in self.data_cache:
             self.backup_cache[batch_id] = self.data_cache[batch_id].copy()
     
-    def _save_batch_info(self, batch_id: str, file_path: str, record_count: int):
-        """Save batch information to database"""
-        try:
-            with SessionLocal() as session:
-                batch_info = BatchInfo(
-                    batch_id=batch_id,
-                    file_path=file_path,
-                    record_count=record_count,
-                    created_at=datetime.now()
-                )
-                session.add(batch_info)
-                session.commit()
-        except Exception as e:
-            logger.error(f"Failed to save batch info: {e}")
+    def _save_records(self, session, batch_id: str, chunk: pd.DataFrame):
+        """Write one chunk of loaded rows as cattle records; the caller commits"""
+        columns = [column for column in CATTLE_RECORD_COLUMNS if column in chunk.columns and column != 'batch_id']
+        records = chunk[columns].copy()
+        if 'lot_id' in records:
+            records['lot_id'] = records['lot_id'].astype(str)
+        if 'weight' in records:
+            records['weight'] = pd.to_numeric(records['weight'], errors='coerce')
+        if 'birth_date' in records:
+            records['birth_date'] = pd.to_datetime(records['birth_date'], errors='coerce')
+        records['batch_id'] = batch_id
+        
+        # Missing values (NaN/NaT) are stored as NULL
+        rows = records.astype(object).where(records.notna(), None).to_dict(orient='records')
+        bulk_copy_records(session, rows, columns=tuple(records.columns))
     
     def _log_operation(self, batch_id: str, parsed_rule: ParsedRule, 
                       changes: List[Dict[str, Any]], client_name: str) -> str:
@@ -429,9 +539,8 @@ class DataProcessor:
                     batch_id=batch_id,
                     rule_type=parsed_rule.rule_type.value,
                     rule_description=parsed_rule.description,
-                    changes_made=json.dumps(changes),
-                    client_name=client_name,
-                    created_at=datetime.now()
+                    changes_made=changes,
+                    client_name=client_name
                 )
                 session.add(operation_log)
                 session.commit()
@@ -449,8 +558,7 @@ class DataProcessor:
                     batch_id=batch_id,
                     rule_type='rollback',
                     rule_description=f'Rollback of operation {operation_id}',
-                    changes_made='{}',
-                    created_at=datetime.now()
+                    changes_made={}
                 )
                 session.add(rollback_log)
                 session.commit()
@@ -13,8 +13,9 @@ from typing import Dict, Any, List, Optional, TypedDict, Annotated
 from datetime import datetime
 from enum import Enum
 
-from langgraph import StateGraph, END
+from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import tool
@@ -63,8 +64,17 @@ class WorkflowStep(Enum):
 class DataHerdWorkflow:
     """Multi-agent workflow orchestrator for DataHerd"""
     
-    def __init__(self):
-        """Initialize the workflow with all necessary components"""
+    def __init__(self, checkpointer: Optional[Any] = None):
+        """
+        Initialize the workflow with all necessary components
+        
+        Args:
+            checkpointer: Optional LangGraph checkpointer; when given, each
+                batch's progress is saved under its thread and reruns resume
+                from the last checkpoint. Build it with checkpoint_serializer()
+                so saved rules can be restored
+        """
+        self.checkpointer = checkpointer
         self.nlp_processor = NLPProcessor()
         self.data_processor = DataProcessor()
         self.rule_manager = RuleManager()
@@ -80,6 +90,19 @@ class DataHerdWorkflow:
         # Build the workflow graph
         self.workflow = self._build_workflow()
     
+    def use_checkpointer(self, checkpointer: Optional[Any]) -> None:
+        """
+        Recompile the workflow graph against a different checkpointer
+        
+        The agents and LLM client are kept, so this is cheap compared with
+        creating a new workflow.
+        
+        Args:
+            checkpointer: LangGraph checkpointer, or None to disable checkpoints
+        """
+        self.checkpointer = checkpointer
+        self.workflow = self._build_workflow()
+    
     def _build_workflow(self) -> StateGraph:
         """Build the LangGraph workflow"""
         
@@ -119,7 +142,7 @@ class DataHerdWorkflow:
         workflow.add_edge("quality_agent", "reporting_agent")
         workflow.add_edge("reporting_agent", END)
         
-        return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpointer)
     
     def data_ingestion_agent(self, state: WorkflowState) -> WorkflowState:
         """Agent responsible for data ingestion and initial processing"""
@@ -723,23 +746,10 @@ class DataHerdWorkflow:
         
         return state
     
-    def run_workflow(self, batch_id: str, client_context: str = "Default", 
-                    initial_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """
-        Execute the complete DataHerd workflow
-        
-        Args:
-            batch_id: Unique identifier for the batch
-            client_context: Client context for rule customization
-            initial_data: Initial data for processing
-            
-        Returns:
-            Final workflow state with all results
-        """
-        logger.info(f"Starting DataHerd workflow for batch: {batch_id}")
-        
-        # Initialize workflow state
-        initial_state = WorkflowState(
+    def _initial_state(self, batch_id: str, client_context: str,
+                       initial_data: Optional[Dict[str, Any]]) -> WorkflowState:
+        """Build the state a workflow run starts from"""
+        return WorkflowState(
             batch_id=batch_id,
             messages=[],
             current_step="initializing",
@@ -754,28 +764,125 @@ class DataHerdWorkflow:
             requires_human_approval=False,
             workflow_complete=False
         )
+    
+    def _run_config(self, batch_id: str, thread_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Build the run config selecting the checkpoint thread, if checkpointing"""
+        if self.checkpointer is None:
+            return None
+        return {"configurable": {"thread_id": thread_id or batch_id}}
+    
+    def _failed_state(self, batch_id: str, error: Exception) -> Dict[str, Any]:
+        """Build the result returned when a workflow run raises"""
+        logger.error(f"Workflow execution failed: {error}")
+        return {
+            "batch_id": batch_id,
+            "error": str(error),
+            "workflow_complete": False,
+            "error_message": f"Workflow execution failed: {str(error)}"
+        }
+    
+    def run_workflow(self, batch_id: str, client_context: str = "Default", 
+                    initial_data: Optional[Dict[str, Any]] = None,
+                    thread_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Execute the complete DataHerd workflow
+        
+        With a checkpointer, a thread that already ran to the end returns its
+        saved state and an interrupted thread resumes from its last step.
+        
+        Args:
+            batch_id: Unique identifier for the batch
+            client_context: Client context for rule customization
+            initial_data: Initial data for processing
+            thread_id: Checkpoint thread to use; defaults to batch_id
+            
+        Returns:
+            Final workflow state with all results
+        """
+        logger.info(f"Starting DataHerd workflow for batch: {batch_id}")
+        
+        initial_state = self._initial_state(batch_id, client_context, initial_data)
+        config = self._run_config(batch_id, thread_id)
         
         try:
+            if config is not None:
+                snapshot = self.workflow.get_state(config)
+                if snapshot.values and not snapshot.next:
+                    logger.info(f"Returning checkpointed state for batch: {batch_id}")
+                    return dict(snapshot.values)
+                if snapshot.next:
+                    initial_state = None
+            
             # Execute the workflow
-            final_state = self.workflow.invoke(initial_state)
+            final_state = self.workflow.invoke(initial_state, config=config)
             
             logger.info(f"Workflow completed successfully for batch: {batch_id}")
             return dict(final_state)
             
         except Exception as e:
-            logger.error(f"Workflow execution failed: {e}")
-            return {
-                "batch_id": batch_id,
-                "error": str(e),
-                "workflow_complete": False,
-                "error_message": f"Workflow execution failed: {str(e)}"
-            }
+            return self._failed_state(batch_id, e)
+    
+    async def arun_workflow(self, batch_id: str, client_context: str = "Default",
+                            initial_data: Optional[Dict[str, Any]] = None,
+                            thread_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Execute the complete DataHerd workflow without blocking the event loop
+        
+        The graph is driven through ainvoke, so callers can run several
+        batches concurrently on one loop. The agent nodes themselves are
+        synchronous and LangGraph runs them in its executor. Checkpoints are
+        handled as in run_workflow, so the checkpointer must support the
+        async interface.
+        
+        Args:
+            batch_id: Unique identifier for the batch
+            client_context: Client context for rule customization
+            initial_data: Initial data for processing
+            thread_id: Checkpoint thread to use; defaults to batch_id
+            
+        Returns:
+            Final workflow state with all results
+        """
+        logger.info(f"Starting DataHerd workflow for batch: {batch_id}")
+        
+        initial_state = self._initial_state(batch_id, client_context, initial_data)
+        config = self._run_config(batch_id, thread_id)
+        
+        try:
+            if config is not None:
+                snapshot = await self.workflow.aget_state(config)
+                if snapshot.values and not snapshot.next:
+                    logger.info(f"Returning checkpointed state for batch: {batch_id}")
+                    return dict(snapshot.values)
+                if snapshot.next:
+                    initial_state = None
+            
+            final_state = await self.workflow.ainvoke(initial_state, config=config)
+            
+            logger.info(f"Workflow completed successfully for batch: {batch_id}")
+            return dict(final_state)
+            
+        except Exception as e:
+            return self._failed_state(batch_id, e)
+
+
+def checkpoint_serializer() -> JsonPlusSerializer:
+    """Serializer for checkpointers that can restore the DataHerd types kept in the workflow state"""
+    try:
+        return JsonPlusSerializer(allowed_msgpack_modules=[
+            (ParsedRule.__module__, ParsedRule.__name__),
+            (RuleType.__module__, RuleType.__name__),
+        ])
+    except TypeError:
+        # langgraph-checkpoint releases without the msgpack allow-list do not
+        # take the keyword and restore these types by default
+        return JsonPlusSerializer()
 
 
 # Convenience function for external usage
-def create_dataherd_workflow() -> DataHerdWorkflow:
+def create_dataherd_workflow(checkpointer: Optional[Any] = None) -> DataHerdWorkflow:
     """Create and return a DataHerd workflow instance"""
-    return DataHerdWorkflow()
+    return DataHerdWorkflow(checkpointer=checkpointer)
 
 
 # Example usage and testing
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 import pandas as pd
 from sqlalchemy import func, and_
+from sqlalchemy.orm import load_only
 
 from db.models import OperationLog, BatchInfo, CleaningRule, RuleApplication
 from db.base import SessionLocal
@@ -120,15 +121,19 @@ class ReportGenerator:
             if operator_id:
                 filters.append(OperationLog.operator_id == operator_id)
             if start_date:
-                start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+                start_dt = self._local_day_start(start_date)
                 filters.append(OperationLog.created_at >= start_dt)
             if end_date:
-                end_dt = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+                end_dt = self._local_day_start(end_date, days=1)
                 filters.append(OperationLog.created_at < end_dt)
             
             # Query operations
             with SessionLocal() as session:
-                query = session.query(OperationLog)
+                # Every listed column is reported; skip the changes_made JSON
+                query = session.query(OperationLog).options(load_only(
+                    OperationLog.operation_id, OperationLog.batch_id, OperationLog.rule_type,
+                    OperationLog.rule_description, OperationLog.client_name, OperationLog.created_at
+                ))
                 if filters:
                     query = query.filter(and_(*filters))
                 
@@ -196,17 +201,26 @@ class ReportGenerator:
             # Build date filters
             filters = [OperationLog.client_name == client_name]
             if start_date:
-                start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+                start_dt = self._local_day_start(start_date)
                 filters.append(OperationLog.created_at >= start_dt)
             if end_date:
-                end_dt = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+                end_dt = self._local_day_start(end_date, days=1)
                 filters.append(OperationLog.created_at < end_dt)
             
             # Query client operations
             with SessionLocal() as session:
-                operations = session.query(OperationLog).filter(
+                # Only the count and the most recent operations are reported,
+                # so do not load the client's full history
+                operation_count = session.query(func.count(OperationLog.operation_id)).filter(
                     and_(*filters)
-                ).order_by(OperationLog.created_at.desc()).all()
+                ).scalar()
+                
+                operations = session.query(OperationLog).options(load_only(
+                    OperationLog.operation_id, OperationLog.batch_id,
+                    OperationLog.rule_type, OperationLog.created_at
+                )).filter(
+                    and_(*filters)
+                ).order_by(OperationLog.created_at.desc()).limit(10).all()
                 
                 # Get client rules
                 rules = session.query(CleaningRule).filter(
@@ -215,10 +229,10 @@ class ReportGenerator:
                 ).all()
             
             # Calculate client statistics
-            client_stats = self._calculate_client_statistics(operations, rules)
+            client_stats = self._calculate_client_statistics(operation_count, operations, rules)
             
             # Generate client insights
-            insights = self._generate_client_insights(operations, rules)
+            insights = self._generate_client_insights(operation_count, rules)
             
             return {
                 'report_id': report_id,
@@ -241,7 +255,7 @@ class ReportGenerator:
                         'rule_type': op.rule_type,
                         'created_at': op.created_at.isoformat()
                     }
-                    for op in operations[:10]  # Last 10 operations
+                    for op in operations  # Last 10 operations
                 ],
                 'active_rules': [
                     {
@@ -439,6 +453,23 @@ class ReportGenerator:
             }
         }
     
+    def _local_day_start(self, date_str: str, days: int = 0) -> datetime:
+        """
+        Start of a YYYY-MM-DD date in the local time zone as an aware datetime
+        
+        Report filters take dates as the user sees them, while created_at is
+        stored in UTC; an aware bound value is converted to UTC when the query
+        runs, so the day boundaries match local midnight.
+        
+        Args:
+            date_str: Date in YYYY-MM-DD format
+            days: Number of days to move the start forward
+            
+        Returns:
+            Local midnight of the date, days later, with its UTC offset
+        """
+        return (datetime.strptime(date_str, '%Y-%m-%d') + timedelta(days=days)).astimezone()
+    
     def _calculate_operation_statistics(self, operations: List[Any]) -> Dict[str, Any]:
         """Calculate operation statistics"""
         if not operations:
@@ -480,9 +511,9 @@ class ReportGenerator:
         
         return timeline
     
-    def _calculate_client_statistics(self, operations: List[Any], rules: List[Any]) -> Dict[str, Any]:
+    def _calculate_client_statistics(self, total_operations: int, recent_operations: List[Any],
+                                     rules: List[Any]) -> Dict[str, Any]:
         """Calculate client-specific statistics"""
-        total_operations = len(operations)
         total_rules = len(rules)
         
         # Calculate average success rate
@@ -492,15 +523,15 @@ class ReportGenerator:
             'total_operations': total_operations,
             'active_rules': total_rules,
             'average_success_rate': round(avg_success_rate, 2),
-            'last_operation': operations[0].created_at.isoformat() if operations else None
+            'last_operation': recent_operations[0].created_at.isoformat() if recent_operations else None
         }
     
-    def _generate_client_insights(self, operations: List[Any], rules: List[Any]) -> List[str]:
+    def _generate_client_insights(self, total_operations: int, rules: List[Any]) -> List[str]:
         """Generate insights for client"""
         insights = []
         
-        if operations:
-            insights.append(f"Client has {len(operations)} total operations")
+        if total_operations:
+            insights.append(f"Client has {total_operations} total operations")
         
         if rules:
             insights.append(f"Client has {len(rules)} active cleaning rules")
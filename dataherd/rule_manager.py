@@ -6,30 +6,100 @@ This module manages the lifecycle of cleaning rules including storage,
 retrieval, and client-specific customization.
 """
 
-import json
+import atexit
+import copy
 import logging
+import threading
+import time
 import uuid
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from sqlalchemy import case, func, select, update
 from sqlalchemy.orm import Session
 
-from .nlp_processor import ParsedRule
 from db.models import CleaningRule, RuleApplication, ClientTemplate
 from db.base import SessionLocal
 
+if TYPE_CHECKING:
+    # Only needed for annotations; importing nlp_processor at runtime would
+    # pull in the OpenAI client for every process that manages rules
+    from .nlp_processor import ParsedRule
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class _TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
 class RuleManager:
     """Manager for cleaning rules and templates"""
     
+    # Rules change rarely compared to how often they are read, so lookups are
+    # served from per-process caches that every write path invalidates. The
+    # invalidation only reaches the current process: with several server
+    # workers, the others keep serving their entries until the TTL expires.
+    # Callers get deep copies, so changing a returned rule never alters the cache.
+    _rule_cache = _TTLCache(maxsize=1024, ttl=60)  # rule_id -> rule dict
+    _client_cache = _TTLCache(maxsize=256, ttl=60)  # client_name -> rule list
+    _permanent_cache = _TTLCache(maxsize=1, ttl=60)  # permanent rule list
+    
+    # Rule applications recorded via record_rule_application are queued here
+    # and written in batches by a single background flusher thread shared by
+    # every RuleManager in the process.
+    FLUSH_INTERVAL = 0.05  # seconds between flusher wake-ups
+    FLUSH_BATCH_SIZE = 200  # queue length that triggers an early flush
+    FLUSH_MAX_ATTEMPTS = 5  # failed flushes before an application is dropped
+    
+    _app_queue = deque()
+    _app_attempts = {}  # application_id -> failed flush count
+    _flush_event = threading.Event()
+    _flush_lock = threading.Lock()
+    _flusher_lock = threading.Lock()
+    _flusher = None
+    
     def __init__(self):
         """Initialize the rule manager"""
         pass
     
-    def save_rule(self, parsed_rule: ParsedRule, rule_name: str, 
+    def save_rule(self, parsed_rule: 'ParsedRule', rule_name: str, 
                   client_name: str = "", is_permanent: bool = False) -> str:
         """
         Save a cleaning rule to the database
@@ -55,18 +125,20 @@ class RuleManager:
                     field=parsed_rule.field,
                     condition=parsed_rule.condition,
                     action=parsed_rule.action,
-                    parameters=json.dumps(parsed_rule.parameters),
+                    parameters=parsed_rule.parameters,
                     confidence=parsed_rule.confidence,
                     client_context=client_name,
                     is_permanent=is_permanent,
-                    is_active=True,
-                    created_at=datetime.now(),
-                    updated_at=datetime.now()
+                    is_active=True
                 )
                 
                 session.add(rule)
                 session.commit()
                 
+                self._client_cache.pop(client_name)
+                if is_permanent:
+                    self._permanent_cache.clear()
+                
                 logger.info(f"Rule saved successfully: {rule_id}")
                 return rule_id
                 
@@ -74,6 +146,61 @@ class RuleManager:
             logger.error(f"Failed to save rule: {e}")
             raise
     
+    def save_rules(self, parsed_rules: List['ParsedRule'], rule_names: Optional[List[str]] = None,
+                   client_name: str = "", is_permanent: bool = False) -> List[str]:
+        """
+        Save several cleaning rules in a single transaction
+        
+        Args:
+            parsed_rules: Parsed rule objects, e.g. from a bulk NLP parse
+            rule_names: Human-readable names, one per rule; defaults to each rule's description
+            client_name: Client name for context
+            is_permanent: Whether these are permanent system rules
+        
+        Returns:
+            List of rule ID strings in the same order as parsed_rules
+        """
+        if rule_names is None:
+            rule_names = [parsed_rule.description for parsed_rule in parsed_rules]
+        elif len(rule_names) != len(parsed_rules):
+            raise ValueError("rule_names must contain one name per parsed rule")
+        
+        try:
+            rule_ids = [str(uuid.uuid4()) for _ in parsed_rules]
+            rows = [
+                {
+                    'rule_id': rule_id,
+                    'name': rule_name,
+                    'description': parsed_rule.description,
+                    'rule_type': parsed_rule.rule_type.value,
+                    'field': parsed_rule.field,
+                    'condition': parsed_rule.condition,
+                    'action': parsed_rule.action,
+                    'parameters': parsed_rule.parameters,
+                    'confidence': parsed_rule.confidence,
+                    'client_context': client_name,
+                    'is_permanent': is_permanent,
+                    'is_active': True
+                }
+                for rule_id, rule_name, parsed_rule in zip(rule_ids, rule_names, parsed_rules)
+            ]
+            
+            if rows:
+                with SessionLocal() as session:
+                    session.bulk_insert_mappings(CleaningRule, rows)
+                    session.commit()
+                
+                self._client_cache.pop(client_name)
+                if is_permanent:
+                    self._permanent_cache.clear()
+            
+            logger.info(f"Saved {len(rule_ids)} rules")
+            return rule_ids
+        
+        except Exception as e:
+            logger.error(f"Failed to save rules: {e}")
+            raise
+    
     def get_rule(self, rule_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve a rule by ID
@@ -84,6 +211,10 @@ class RuleManager:
         Returns:
             Rule dictionary or None if not found
         """
+        cached = self._rule_cache.get(rule_id)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             with SessionLocal() as session:
                 rule = session.query(CleaningRule).filter(
@@ -91,7 +222,7 @@ class RuleManager:
                 ).first()
                 
                 if rule:
-                    return {
+                    rule_dict = {
                         'rule_id': rule.rule_id,
                         'name': rule.name,
                         'description': rule.description,
@@ -99,7 +230,7 @@ class RuleManager:
                         'field': rule.field,
                         'condition': rule.condition,
                         'action': rule.action,
-                        'parameters': json.loads(rule.parameters),
+                        'parameters': rule.parameters,
                         'confidence': rule.confidence,
                         'client_context': rule.client_context,
                         'is_permanent': rule.is_permanent,
@@ -109,6 +240,8 @@ class RuleManager:
                         'created_at': rule.created_at.isoformat(),
                         'updated_at': rule.updated_at.isoformat()
                     }
+                    self._rule_cache.set(rule_id, rule_dict)
+                    return copy.deepcopy(rule_dict)
                 return None
                 
         except Exception as e:
@@ -123,16 +256,30 @@ class RuleManager:
             client_name: Client name
             
         Returns:
-            List of rule dictionaries
+            List of rule dictionaries; created_at is in Unix epoch seconds
         """
+        cached = self._client_cache.get(client_name)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             with SessionLocal() as session:
-                rules = session.query(CleaningRule).filter(
+                rules = session.query(CleaningRule).with_entities(
+                    CleaningRule.rule_id,
+                    CleaningRule.name,
+                    CleaningRule.description,
+                    CleaningRule.rule_type,
+                    CleaningRule.field,
+                    CleaningRule.confidence,
+                    CleaningRule.usage_count,
+                    CleaningRule.success_rate,
+                    CleaningRule.created_at
+                ).filter(
                     CleaningRule.client_context == client_name,
                     CleaningRule.is_active == True
                 ).all()
                 
-                return [
+                rule_dicts = [
                     {
                         'rule_id': rule.rule_id,
                         'name': rule.name,
@@ -142,10 +289,12 @@ class RuleManager:
                         'confidence': rule.confidence,
                         'usage_count': rule.usage_count,
                         'success_rate': rule.success_rate,
-                        'created_at': rule.created_at.isoformat()
+                        'created_at': int(rule.created_at.timestamp())
                     }
                     for rule in rules
                 ]
+                self._client_cache.set(client_name, rule_dicts)
+                return copy.deepcopy(rule_dicts)
                 
         except Exception as e:
             logger.error(f"Failed to retrieve client rules: {e}")
@@ -156,16 +305,30 @@ class RuleManager:
         Get all permanent system rules
         
         Returns:
-            List of permanent rule dictionaries
+            List of permanent rule dictionaries; created_at is in Unix epoch seconds
         """
+        cached = self._permanent_cache.get('permanent')
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             with SessionLocal() as session:
-                rules = session.query(CleaningRule).filter(
+                rules = session.query(CleaningRule).with_entities(
+                    CleaningRule.rule_id,
+                    CleaningRule.name,
+                    CleaningRule.description,
+                    CleaningRule.rule_type,
+                    CleaningRule.field,
+                    CleaningRule.confidence,
+                    CleaningRule.usage_count,
+                    CleaningRule.success_rate,
+                    CleaningRule.created_at
+                ).filter(
                     CleaningRule.is_permanent == True,
                     CleaningRule.is_active == True
                 ).all()
                 
-                return [
+                rule_dicts = [
                     {
                         'rule_id': rule.rule_id,
                         'name': rule.name,
@@ -175,10 +338,12 @@ class RuleManager:
                         'confidence': rule.confidence,
                         'usage_count': rule.usage_count,
                         'success_rate': rule.success_rate,
-                        'created_at': rule.created_at.isoformat()
+                        'created_at': int(rule.created_at.timestamp())
                     }
                     for rule in rules
                 ]
+                self._permanent_cache.set('permanent', rule_dicts)
+                return copy.deepcopy(rule_dicts)
                 
         except Exception as e:
             logger.error(f"Failed to retrieve permanent rules: {e}")
@@ -197,15 +362,19 @@ class RuleManager:
         """
         try:
             with SessionLocal() as session:
-                rule = session.query(CleaningRule).filter(
-                    CleaningRule.rule_id == rule_id,
-                    CleaningRule.is_permanent == True
-                ).first()
+                result = session.execute(
+                    update(CleaningRule)
+                    .where(
+                        CleaningRule.rule_id == rule_id,
+                        CleaningRule.is_permanent == True
+                    )
+                    .values(description=new_description),
+                    execution_options={'synchronize_session': False}
+                )
+                session.commit()
                 
-                if rule:
-                    rule.description = new_description
-                    rule.updated_at = datetime.now()
-                    session.commit()
+                if result.rowcount > 0:
+                    self._invalidate_rule(rule_id)
                     logger.info(f"Permanent rule updated: {rule_id}")
                     return True
                 else:
@@ -228,14 +397,16 @@ class RuleManager:
         """
         try:
             with SessionLocal() as session:
-                rule = session.query(CleaningRule).filter(
-                    CleaningRule.rule_id == rule_id
-                ).first()
+                result = session.execute(
+                    update(CleaningRule)
+                    .where(CleaningRule.rule_id == rule_id)
+                    .values(is_active=False),
+                    execution_options={'synchronize_session': False}
+                )
+                session.commit()
                 
-                if rule:
-                    rule.is_active = False
-                    rule.updated_at = datetime.now()
-                    session.commit()
+                if result.rowcount > 0:
+                    self._invalidate_rule(rule_id)
                     logger.info(f"Rule deactivated: {rule_id}")
                     return True
                 else:
@@ -267,40 +438,188 @@ class RuleManager:
                     application_id=str(uuid.uuid4()),
                     rule_id=rule_id,
                     batch_id=batch_id,
-                    applied_at=datetime.now(),
                     success=success,
                     changes_made=changes_made
                 )
                 session.add(application)
                 
-                # Update rule statistics
-                rule = session.query(CleaningRule).filter(
-                    CleaningRule.rule_id == rule_id
-                ).first()
-                
-                if rule:
-                    rule.usage_count += 1
-                    
-                    # Calculate success rate
-                    total_applications = session.query(RuleApplication).filter(
-                        RuleApplication.rule_id == rule_id
-                    ).count()
-                    
-                    successful_applications = session.query(RuleApplication).filter(
-                        RuleApplication.rule_id == rule_id,
-                        RuleApplication.success == True
-                    ).count()
-                    
-                    rule.success_rate = (successful_applications / total_applications * 100) if total_applications > 0 else 0
-                    rule.updated_at = datetime.now()
-                
+                # Usage statistics are derived from the applications, so the
+                # rule row itself is not updated
                 session.commit()
+                self._invalidate_usage(session, [rule_id])
                 return True
                 
         except Exception as e:
             logger.error(f"Failed to track rule usage: {e}")
             return False
     
+    def record_rule_application(self, rule_id: str, batch_id: str,
+                                success: bool, changes_made: int) -> None:
+        """
+        Queue a rule application for asynchronous persistence
+        
+        Unlike track_rule_usage, this does not touch the database on the
+        caller's thread. The background flusher writes queued applications
+        in one transaction per batch.
+        
+        Args:
+            rule_id: Rule identifier
+            batch_id: Batch identifier
+            success: Whether the rule application was successful
+            changes_made: Number of changes made
+        """
+        self._app_queue.append({
+            'application_id': str(uuid.uuid4()),
+            'rule_id': rule_id,
+            'batch_id': batch_id,
+            'success': success,
+            'changes_made': changes_made
+        })
+        self._ensure_flusher()
+        
+        if len(self._app_queue) > self.FLUSH_BATCH_SIZE:
+            self._flush_event.set()
+    
+    @classmethod
+    def flush_applications(cls) -> int:
+        """
+        Synchronously write all queued rule applications
+        
+        Applications whose rule no longer exists are logged and dropped
+        before the write, so they cannot fail the rest of the batch. If the
+        write fails, the applications are put back at the front of the
+        queue for the next flush; one that has failed FLUSH_MAX_ATTEMPTS
+        times is logged and dropped.
+        
+        Returns:
+            Number of applications written
+        """
+        with cls._flush_lock:
+            batch = [cls._app_queue.popleft() for _ in range(len(cls._app_queue))]
+            if not batch:
+                return 0
+            
+            try:
+                with SessionLocal() as session:
+                    # Resolve every queued rule in a single IN (...) lookup
+                    existing = {
+                        rule_id for (rule_id,) in session.query(CleaningRule.rule_id).filter(
+                            CleaningRule.rule_id.in_({app['rule_id'] for app in batch})
+                        )
+                    }
+                    for app in batch:
+                        if app['rule_id'] not in existing:
+                            cls._app_attempts.pop(app['application_id'], None)
+                            logger.error(f"Dropping rule application {app['application_id']} "
+                                         f"for missing rule {app['rule_id']}")
+                    batch = [app for app in batch if app['rule_id'] in existing]
+                    if not batch:
+                        return 0
+                    
+                    cls._write_applications(session, batch)
+                    session.commit()
+                    cls._invalidate_usage(session, {app['rule_id'] for app in batch})
+                
+                for app in batch:
+                    cls._app_attempts.pop(app['application_id'], None)
+                return len(batch)
+                
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} rule applications: {e}")
+                retry = []
+                for app in batch:
+                    attempts = cls._app_attempts.get(app['application_id'], 0) + 1
+                    if attempts < cls.FLUSH_MAX_ATTEMPTS:
+                        cls._app_attempts[app['application_id']] = attempts
+                        retry.append(app)
+                    else:
+                        cls._app_attempts.pop(app['application_id'], None)
+                        logger.error(f"Dropping rule application {app['application_id']} "
+                                     f"after {attempts} failed flushes")
+                cls._app_queue.extendleft(reversed(retry))
+                return 0
+    
+    @classmethod
+    def _invalidate_rule(cls, rule_id: str):
+        """Drop a changed rule from the rule cache and every cached rule list"""
+        cls._rule_cache.pop(rule_id)
+        cls._client_cache.clear()
+        cls._permanent_cache.clear()
+    
+    @classmethod
+    def _invalidate_usage(cls, session: Session, rule_ids):
+        """
+        Drop cached entries whose usage statistics changed
+        
+        usage_count and success_rate are computed from rule applications, so
+        new applications change the rules' own entries, their clients' rule
+        lists and, for permanent rules, the permanent rule list.
+        
+        Args:
+            session: Open database session used to look up the rules' clients
+            rule_ids: Rules that received new applications
+        """
+        rule_ids = list(rule_ids)
+        for rule_id in rule_ids:
+            cls._rule_cache.pop(rule_id)
+        
+        try:
+            rules = session.execute(
+                select(CleaningRule.client_context, CleaningRule.is_permanent)
+                .where(CleaningRule.rule_id.in_(rule_ids))
+            ).all()
+        except Exception as e:
+            # The applications are already committed; fall back to dropping
+            # every cached rule list rather than failing the caller
+            logger.warning(f"Failed to look up rules for cache invalidation: {e}")
+            cls._client_cache.clear()
+            cls._permanent_cache.clear()
+            return
+        
+        for client_context, is_permanent in rules:
+            cls._client_cache.pop(client_context)
+            if is_permanent:
+                cls._permanent_cache.clear()
+    
+    @classmethod
+    def _ensure_flusher(cls):
+        """Start the background flusher thread on first use"""
+        if cls._flusher is not None:
+            return
+        
+        with cls._flusher_lock:
+            if cls._flusher is None:
+                cls._flusher = threading.Thread(
+                    target=cls._flush_applications,
+                    name="rule-application-flusher",
+                    daemon=True
+                )
+                cls._flusher.start()
+                # Daemon threads die abruptly at exit; drain what is left
+                atexit.register(cls.flush_applications)
+    
+    @classmethod
+    def _flush_applications(cls):
+        """Flusher loop: wake every FLUSH_INTERVAL or when the queue fills up"""
+        while True:
+            cls._flush_event.wait(cls.FLUSH_INTERVAL)
+            cls._flush_event.clear()
+            cls.flush_applications()
+    
+    @staticmethod
+    def _write_applications(session: Session, applications: List[Dict[str, Any]]):
+        """
+        Insert rule applications with a single executemany INSERT
+        
+        Rule usage statistics are computed from these rows when rules are
+        read, so no rule row needs updating.
+        
+        Args:
+            session: Open database session; the caller commits
+            applications: RuleApplication column mappings
+        """
+        session.bulk_insert_mappings(RuleApplication, applications)
+    
     def create_template(self, client_name: str, template_name: str, 
                        rule_ids: List[str]) -> str:
         """
@@ -322,8 +641,8 @@ class RuleManager:
                     template_id=template_id,
                     client_name=client_name,
                     template_name=template_name,
-                    template_rules=json.dumps(rule_ids),
-                    created_at=datetime.now(),
+                    template_rules=rule_ids,
+                    rule_count=len(rule_ids),
                     is_active=True
                 )
                 
@@ -345,7 +664,7 @@ class RuleManager:
             client_name: Client name
             
         Returns:
-            List of template dictionaries
+            List of template dictionaries; created_at is in Unix epoch seconds
         """
         try:
             with SessionLocal() as session:
@@ -358,8 +677,8 @@ class RuleManager:
                     {
                         'template_id': template.template_id,
                         'template_name': template.template_name,
-                        'rule_count': len(json.loads(template.template_rules)),
-                        'created_at': template.created_at.isoformat()
+                        'rule_count': template.rule_count,
+                        'created_at': int(template.created_at.timestamp())
                     }
                     for template in templates
                 ]
@@ -390,13 +709,30 @@ class RuleManager:
                     logger.warning(f"Template not found: {template_id}")
                     return []
                 
-                rule_ids = json.loads(template.template_rules)
-                applied_rules = []
+                rule_ids = template.template_rules
                 
-                for rule_id in rule_ids:
-                    # Track usage for each rule in template
-                    self.track_rule_usage(rule_id, batch_id, True, 0)
-                    applied_rules.append(rule_id)
+                # Resolve every template rule in a single IN (...) lookup
+                existing = {
+                    rule_id for (rule_id,) in session.query(CleaningRule.rule_id).filter(
+                        CleaningRule.rule_id.in_(rule_ids)
+                    )
+                }
+                applied_rules = [rule_id for rule_id in rule_ids if rule_id in existing]
+                
+                if applied_rules:
+                    # Track usage for all template rules in one transaction
+                    self._write_applications(session, [
+                        {
+                            'application_id': str(uuid.uuid4()),
+                            'rule_id': rule_id,
+                            'batch_id': batch_id,
+                            'success': True,
+                            'changes_made': 0
+                        }
+                        for rule_id in applied_rules
+                    ])
+                    session.commit()
+                    self._invalidate_usage(session, applied_rules)
                 
                 logger.info(f"Template applied: {template_id} to batch {batch_id}")
                 return applied_rules
@@ -417,26 +753,34 @@ class RuleManager:
         """
         try:
             with SessionLocal() as session:
-                query = session.query(CleaningRule)
+                # Per-rule usage aggregated once, then averaged over the rules;
+                # rules that were never applied count as zero usage
+                usage = session.query(
+                    RuleApplication.rule_id,
+                    func.count(RuleApplication.application_id).label('usage_count'),
+                    func.avg(case((RuleApplication.success == True, 100.0), else_=0.0)).label('success_rate')
+                ).group_by(RuleApplication.rule_id).subquery()
+                
+                query = session.query(
+                    func.count(CleaningRule.rule_id),
+                    func.sum(case((CleaningRule.is_active == True, 1), else_=0)),
+                    func.sum(case((CleaningRule.is_permanent == True, 1), else_=0)),
+                    func.avg(func.coalesce(usage.c.usage_count, 0)),
+                    func.avg(func.coalesce(usage.c.success_rate, 0.0))
+                ).outerjoin(usage, usage.c.rule_id == CleaningRule.rule_id)
                 
                 if client_name:
                     query = query.filter(CleaningRule.client_context == client_name)
                 
-                rules = query.all()
-                
-                total_rules = len(rules)
-                active_rules = len([r for r in rules if r.is_active])
-                permanent_rules = len([r for r in rules if r.is_permanent])
-                
-                avg_usage = sum(r.usage_count for r in rules) / total_rules if total_rules > 0 else 0
-                avg_success_rate = sum(r.success_rate for r in rules) / total_rules if total_rules > 0 else 0
+                total_rules, active_rules, permanent_rules, avg_usage, avg_success_rate = query.one()
                 
+                # SUM/AVG are NULL over no rows and may come back as Decimal
                 return {
                     'total_rules': total_rules,
-                    'active_rules': active_rules,
-                    'permanent_rules': permanent_rules,
-                    'average_usage': round(avg_usage, 2),
-                    'average_success_rate': round(avg_success_rate, 2)
+                    'active_rules': int(active_rules or 0),
+                    'permanent_rules': int(permanent_rules or 0),
+                    'average_usage': round(float(avg_usage or 0), 2),
+                    'average_success_rate': round(float(avg_success_rate or 0), 2)
                 }
                 
         except Exception as e:
@@ -3,24 +3,61 @@
 Author: MuYu_Cheney
 """
 
-from sqlalchemy import create_engine
+import orjson
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import StaticPool
 
 from config.config import SQLALCHEMY_DATABASE_URI
 
+# 根据数据库类型选择连接池配置
+database_url = make_url(SQLALCHEMY_DATABASE_URI)
+engine_options = {}
+if database_url.get_backend_name() == "sqlite":
+    # 允许 SQLite 连接在线程之间共享（FastAPI 线程池、后台写入线程）
+    engine_options["connect_args"] = {"check_same_thread": False}
+if database_url.get_backend_name() == "sqlite" and database_url.database in (None, "", ":memory:"):
+    # 内存数据库只存在于单个连接中，所有线程共用同一个连接
+    engine_options["poolclass"] = StaticPool
+else:
+    engine_options.update(
+        pool_size=20,  # 设置连接池大小为20
+        max_overflow=40,  # 最大溢出连接数为40
+        pool_use_lifo=True  # 优先复用最近归还的连接
+    )
+
 # 创建引擎
 engine = create_engine(
     SQLALCHEMY_DATABASE_URI,
     echo=True,
-    pool_size=10,  # 设置连接池大小为10
-    max_overflow=20  # 最大溢出连接数为20
+    pool_pre_ping=True,  # 取出连接前检测是否可用
+    pool_recycle=1800,  # 连接存活超过30分钟后回收
+    query_cache_size=1200,  # 编译后SQL语句的缓存条目数
+    insertmanyvalues_page_size=1000,  # 批量插入时每条 INSERT 语句合并的行数
+    json_serializer=lambda obj: orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode(),  # JSON 列使用 orjson 序列化
+    json_deserializer=orjson.loads,  # JSON 列使用 orjson 反序列化
+    **engine_options
 )
 
+if database_url.get_backend_name() == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """每个新的 SQLite 连接建立时设置写入与缓存相关的 PRAGMA"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")  # WAL 模式下读写互不阻塞（内存数据库会保持 memory 模式）
+        cursor.execute("PRAGMA synchronous=NORMAL")  # WAL 下只在检查点时 fsync，而不是每次提交
+        cursor.execute("PRAGMA temp_store=MEMORY")  # 临时表和排序使用内存
+        cursor.execute("PRAGMA mmap_size=268435456")  # 通过 256MB 内存映射读取数据库文件
+        cursor.execute("PRAGMA cache_size=-65536")  # 每个连接的页缓存为 64MB
+        cursor.close()
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False,
                             autoflush=False,
+                            expire_on_commit=False,  # 提交后不使对象过期，避免再次访问属性时重新查询
                             bind=engine)
 
 # 创建 Base 类
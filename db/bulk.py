@@ -0,0 +1,141 @@
+"""
+DataHerd Bulk Database Helpers
+
+This module contains helpers for writing many rows at once without going
+through the ORM unit of work for each object, and for streaming large
+result sets back without materializing them in one list.
+"""
+
+import csv
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, load_only
+
+from db.models import CattleRecord
+
+# Below this many rows the setup cost of COPY outweighs its speed advantage
+COPY_THRESHOLD = 100
+
+# CattleRecord columns written by bulk_copy_records
+CATTLE_RECORD_COLUMNS = ('lot_id', 'weight', 'breed', 'birth_date', 'health_status', 'feed_type', 'batch_id')
+
+_COPY_NULL = '\\N'
+
+
+def bulk_insert(session: Session, model, dicts: Iterable[Dict[str, Any]], page_size: int = 10_000) -> int:
+    """
+    Insert plain dictionaries into a model's table using executemany
+
+    Rows are sent in pages of page_size so very large inputs do not have to be
+    held in a single parameter list; within each page SQLAlchemy batches the
+    statement further according to the engine's insertmanyvalues_page_size.
+    The caller is responsible for committing the session.
+
+    Args:
+        session: Active database session
+        model: Mapped model class whose table receives the rows
+        dicts: Column-name to value mappings, one per row
+        page_size: Maximum number of rows passed to a single execute call
+
+    Returns:
+        Number of rows inserted
+    """
+    statement = insert(model)
+    total = 0
+    page: List[Dict[str, Any]] = []
+
+    for row in dicts:
+        page.append(row)
+        if len(page) >= page_size:
+            session.execute(statement, page)
+            total += len(page)
+            page = []
+
+    if page:
+        session.execute(statement, page)
+        total += len(page)
+
+    return total
+
+
+def bulk_copy_records(session: Session, records: Iterable[Dict[str, Any]],
+                      columns: Sequence[str] = CATTLE_RECORD_COLUMNS) -> int:
+    """
+    Load cattle records with PostgreSQL COPY, falling back to bulk_insert
+
+    COPY streams the rows as one CSV payload over the session's connection, so
+    the server parses and checks the statement once for the whole load. It is
+    used when the session is bound to PostgreSQL through psycopg2 and there are
+    at least COPY_THRESHOLD rows; every other case goes through bulk_insert.
+    The caller is responsible for committing the session.
+
+    Args:
+        session: Active database session
+        records: Column-name to value mappings, one per cattle record
+        columns: CattleRecord columns to load; missing keys are written as NULL
+
+    Returns:
+        Number of rows loaded
+    """
+    records = list(records)
+    if session.get_bind().dialect.name != 'postgresql' or len(records) < COPY_THRESHOLD:
+        return bulk_insert(session, CattleRecord, records)
+
+    cursor = session.connection().connection.cursor()
+    if not hasattr(cursor, 'copy_expert'):
+        cursor.close()
+        return bulk_insert(session, CattleRecord, records)
+
+    # None is written as the NULL marker declared in the COPY options so it
+    # stays distinct from empty strings
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        row = [record.get(column) for column in columns]
+        writer.writerow([_COPY_NULL if value is None else value for value in row])
+    buffer.seek(0)
+
+    # created_at and updated_at are omitted so the server defaults fill them
+    copy_columns = ', '.join(columns)
+    try:
+        cursor.copy_expert(
+            f"COPY {CattleRecord.__tablename__} ({copy_columns}) FROM STDIN WITH (FORMAT csv, NULL '{_COPY_NULL}')",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+    return len(records)
+
+
+def iter_records(session: Session, batch_id: str, chunk: int = 1000,
+                 columns: Optional[Sequence[str]] = None) -> Iterator[CattleRecord]:
+    """
+    Stream the cattle records of a batch in fixed-size chunks
+
+    Rows are fetched and hydrated chunk rows at a time with yield_per, so
+    memory stays bounded however large the batch is. The session must stay
+    open until the generator is exhausted, and objects from earlier chunks
+    should not be held on to if memory matters.
+
+    Args:
+        session: Active database session
+        batch_id: Batch whose records are streamed
+        chunk: Number of rows fetched and hydrated per round trip
+        columns: CattleRecord attributes to load; all columns when None
+
+    Returns:
+        Iterator over CattleRecord objects ordered by primary key
+    """
+    statement = (
+        select(CattleRecord)
+        .where(CattleRecord.batch_id == batch_id)
+        .order_by(CattleRecord.id)
+        .execution_options(yield_per=chunk)
+    )
+    if columns:
+        statement = statement.options(load_only(*(getattr(CattleRecord, name) for name in columns)))
+
+    yield from session.scalars(statement)
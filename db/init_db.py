@@ -11,20 +11,34 @@ from db.base import Base, engine, SessionLocal
 from db.models import CattleRecord, CleaningRule, OperationLog, BatchInfo, LotInfo
 
 
+# 用于检查数据库的引擎（不指定数据库名），按连接地址缓存，多次调用复用同一连接池
+_check_engines = {}
+
+
+def _get_check_engine(username: str, password: str, hostname: str):
+    url = f"mysql+pymysql://{username}:{password}@{hostname}?charset=utf8mb4"
+    if url not in _check_engines:
+        _check_engines[url] = create_engine(url)
+    return _check_engines[url]
+
+
 # 检查数据库是否存在，并在需要时创建数据库（仅适用于 MySQL）
 def create_database_if_not_exists(username: str, password: str, hostname: str, database_name: str):
     # 只有在使用 MySQL 时才需要预先创建数据库
     if not SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
-        # 创建一个连接到数据库的引擎（没有指定数据库名）
-        engine_for_check = create_engine(f"mysql+pymysql://{username}:{password}@{hostname}?charset=utf8mb4")
+        engine_for_check = _get_check_engine(username, password, hostname)
 
         with engine_for_check.connect() as connection:
-            # 执行 SQL 查询，检查数据库是否存在
-            result = connection.execute(text(f"SHOW DATABASES LIKE '{database_name}'"))
-            if result.fetchone() is None:
-                # 数据库不存在，执行创建数据库
+            # 通过 information_schema 按参数查询数据库是否存在，避免拼接 SQL
+            exists = connection.execute(
+                text("SELECT 1 FROM information_schema.schemata WHERE schema_name = :name"),
+                {"name": database_name}
+            ).scalar()
+            if exists is None:
+                # 数据库不存在，执行创建数据库（数据库名不能作为绑定参数，需按标识符转义）
+                quoted_name = connection.dialect.identifier_preparer.quote_identifier(database_name)
                 connection.execute(
-                    text(f"CREATE DATABASE {database_name} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"))
+                    text(f"CREATE DATABASE {quoted_name} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"))
                 print(f"Database '{database_name}' created successfully.")
             else:
                 print(f"Database '{database_name}' already exists.")
@@ -32,6 +46,13 @@ def create_database_if_not_exists(username: str, password: str, hostname: str, d
         print("Using SQLite database - no pre-creation needed.")
 
 
+def dispose_check_engines():
+    # 关闭检查数据库时使用的连接池（在程序退出时调用）
+    for engine_for_check in _check_engines.values():
+        engine_for_check.dispose()
+    _check_engines.clear()
+
+
 # 定义数据库模型初始化函数
 def initialize_database():
     try:
@@ -56,4 +77,5 @@ def delete_database():
 
 if __name__ == '__main__':
     initialize_database()
+    dispose_check_engines()
     # delete_database()
\ No newline at end of file
@@ -4,68 +4,117 @@ DataHerd Database Models
 This module contains the database models specifically designed for cattle data cleaning operations.
 """
 
-from sqlalchemy import Column, String, Text, DateTime, Boolean, Integer, ForeignKey, Float
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from sqlalchemy import DDL, DateTime, FetchedValue, Text, Float, ForeignKey, Index, JSON, TypeDecorator, Uuid, case, event, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 from sqlalchemy.sql import func
 
-Base = declarative_base()
+from db.base import Base, engine
+
+# JSON documents are stored as JSONB on PostgreSQL (indexable, parsed once on
+# write) and as the generic JSON type elsewhere
+JSONType = JSON().with_variant(JSONB, 'postgresql')
+
+class UTCDateTime(TypeDecorator):
+    """
+    Timestamp that is always UTC and timezone-aware on the Python side
+    
+    PostgreSQL stores timestamptz, but SQLite has no time zone support and
+    returns CURRENT_TIMESTAMP as a naive UTC value, which .timestamp() and
+    .isoformat() would otherwise treat as local time. Naive values are read
+    and bound as UTC, aware values are converted to UTC, and backends without
+    timestamptz receive them naive.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+        return value if dialect.name == 'postgresql' else value.replace(tzinfo=None)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+# Timestamps are filled in by the database's clock and handled as UTC
+TimestampType = UTCDateTime()
+
+# updated_at is maintained by a trigger on PostgreSQL rather than an extra SET
+# clause on every UPDATE; other backends get the SET clause from SQLAlchemy,
+# which leaves an explicitly assigned value alone
+if engine.dialect.name == 'postgresql':
+    _updated_at_options = {'server_onupdate': FetchedValue()}
+else:
+    _updated_at_options = {'onupdate': func.now()}
 
 class CattleRecord(Base):
     """Model for storing cattle data records."""
     __tablename__ = 'cattle_records'
+    __table_args__ = (
+        Index('ix_cattlerecord_batch_lot', 'batch_id', 'lot_id'),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    lot_id: Mapped[str] = mapped_column(index=True)
+    weight: Mapped[Optional[float]] = mapped_column(Float)
+    breed: Mapped[Optional[str]] = mapped_column()
+    birth_date: Mapped[Optional[datetime]] = mapped_column()
+    health_status: Mapped[Optional[str]] = mapped_column()
+    feed_type: Mapped[Optional[str]] = mapped_column()
+    batch_id: Mapped[Optional[str]] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now(), **_updated_at_options)
     
-    id = Column(Integer, primary_key=True, index=True)
-    lot_id = Column(String, nullable=False, index=True)
-    weight = Column(Float, nullable=True)
-    breed = Column(String, nullable=True)
-    birth_date = Column(DateTime, nullable=True)
-    health_status = Column(String, nullable=True)
-    feed_type = Column(String, nullable=True)
-    batch_id = Column(String, nullable=True, index=True)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
-
     def __repr__(self):
         return f"<CattleRecord(lot_id='{self.lot_id}', weight={self.weight}, breed='{self.breed}')>"
 
 class CleaningRule(Base):
     """Model for storing data cleaning rules."""
     __tablename__ = 'cleaning_rules'
+    __table_args__ = (
+        Index('ix_cleaningrule_client_active', 'client_context', 'is_active'),
+        Index('ix_cleaningrule_parameters_gin', 'parameters', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
+    
+    rule_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, index=True)
+    name: Mapped[str] = mapped_column()  # e.g., 'Weight Anomaly Check'
+    description: Mapped[Optional[str]] = mapped_column(Text)  # Natural language description of the rule
+    rule_type: Mapped[str] = mapped_column()  # validation, standardization, cleaning, estimation
+    field: Mapped[Optional[str]] = mapped_column()  # Field to apply rule to
+    condition: Mapped[Optional[str]] = mapped_column(Text)  # Python condition string
+    action: Mapped[Optional[str]] = mapped_column()  # Action to take
+    parameters: Mapped[Optional[Any]] = mapped_column(JSONType)  # JSON parameters
+    confidence: Mapped[Optional[float]] = mapped_column(Float, default=0.0)  # Rule confidence score
+    client_context: Mapped[Optional[str]] = mapped_column(index=True)  # Client context
+    is_permanent: Mapped[Optional[bool]] = mapped_column(default=False, index=True)  # Whether this rule is permanently applied
+    is_active: Mapped[Optional[bool]] = mapped_column(default=True)  # Whether rule is active
+    created_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now(), **_updated_at_options)
     
-    rule_id = Column(String, primary_key=True, index=True)
-    name = Column(String, nullable=False)  # e.g., 'Weight Anomaly Check'
-    description = Column(Text, nullable=True)  # Natural language description of the rule
-    rule_type = Column(String, nullable=False)  # validation, standardization, cleaning, estimation
-    field = Column(String, nullable=True)  # Field to apply rule to
-    condition = Column(Text, nullable=True)  # Python condition string
-    action = Column(String, nullable=True)  # Action to take
-    parameters = Column(Text, nullable=True)  # JSON parameters
-    confidence = Column(Float, default=0.0)  # Rule confidence score
-    client_context = Column(String, index=True, nullable=True)  # Client context
-    is_permanent = Column(Boolean, default=False)  # Whether this rule is permanently applied
-    is_active = Column(Boolean, default=True)  # Whether rule is active
-    usage_count = Column(Integer, default=0)  # Number of times used
-    success_rate = Column(Float, default=0.0)  # Success rate percentage
-    last_used = Column(DateTime, nullable=True)  # Last usage timestamp
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
-
     def __repr__(self):
         return f"<CleaningRule(rule_id='{self.rule_id}', name='{self.name}', client_context='{self.client_context}')>"
 
 class OperationLog(Base):
     """Model for storing operation logs."""
     __tablename__ = 'operation_logs'
+    __table_args__ = (
+        Index('ix_operationlog_batch_ruletype', 'batch_id', 'rule_type'),
+    )
+    
+    operation_id: Mapped[str] = mapped_column(primary_key=True, index=True)
+    batch_id: Mapped[str] = mapped_column()  # ID of the batch being cleaned
+    rule_type: Mapped[Optional[str]] = mapped_column()  # Type of rule applied
+    rule_description: Mapped[Optional[str]] = mapped_column(Text)  # Description of the rule
+    changes_made: Mapped[Optional[Any]] = mapped_column(JSONType)  # JSON list of changes made
+    client_name: Mapped[Optional[str]] = mapped_column()  # Client name
+    created_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now())
     
-    operation_id = Column(String, primary_key=True, index=True)
-    batch_id = Column(String, nullable=False)  # ID of the batch being cleaned
-    rule_type = Column(String, nullable=True)  # Type of rule applied
-    rule_description = Column(Text, nullable=True)  # Description of the rule
-    changes_made = Column(Text, nullable=True)  # JSON string of changes made
-    client_name = Column(String, nullable=True)  # Client name
-    created_at = Column(DateTime, default=func.now())
-
     def __repr__(self):
         return f"<OperationLog(operation_id='{self.operation_id}', batch_id='{self.batch_id}', rule_type='{self.rule_type}')>"
 
@@ -73,11 +122,14 @@ class BatchInfo(Base):
     """Model for storing batch information."""
     __tablename__ = 'batch_info'
     
-    batch_id = Column(String, primary_key=True, index=True)
-    file_path = Column(String, nullable=True)  # Path to the raw data file/source
-    record_count = Column(Integer, default=0)  # Number of records in batch
-    created_at = Column(DateTime, default=func.now())
-
+    batch_id: Mapped[str] = mapped_column(primary_key=True, index=True)
+    file_path: Mapped[Optional[str]] = mapped_column()  # Path to the raw data file/source
+    record_count: Mapped[Optional[int]] = mapped_column(default=0)  # Number of records in batch
+    created_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now())
+    
+    # Never lazy-loaded; callers that need a batch's lots must load them explicitly
+    lots: Mapped[List["LotInfo"]] = relationship(back_populates="batch", lazy="raise")
+    
     def __repr__(self):
         return f"<BatchInfo(batch_id='{self.batch_id}', record_count={self.record_count})>"
 
@@ -85,18 +137,21 @@ class LotInfo(Base):
     """Model for storing lot information."""
     __tablename__ = 'lot_info'
     
-    id = Column(String, primary_key=True, index=True)
-    batch_id = Column(String, ForeignKey('batch_info.id'), nullable=False)
-    lot_name = Column(String, nullable=False)
-    original_data = Column(Text, nullable=True)  # Store original lot data (e.g., JSON string)
-    cleaned_data = Column(Text, nullable=True)  # Store cleaned lot data (e.g., JSON string)
-    status = Column(String, default='original')  # e.g., 'original', 'flagged', 'cleaned', 'deleted'
-    issue_description = Column(Text, nullable=True)  # Description of issues found
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
-
-    batch = relationship("BatchInfo")
-
+    id: Mapped[str] = mapped_column(primary_key=True, index=True)
+    batch_id: Mapped[str] = mapped_column(ForeignKey('batch_info.batch_id'))
+    lot_name: Mapped[str] = mapped_column()
+    # The JSON snapshots are left out of the SELECT until one of them is
+    # accessed, then both are loaded together in a single query
+    original_data: Mapped[Optional[Any]] = mapped_column(JSONType, deferred=True, deferred_group='blobs')  # Store original lot data as JSON
+    cleaned_data: Mapped[Optional[Any]] = mapped_column(JSONType, deferred=True, deferred_group='blobs')  # Store cleaned lot data as JSON
+    status: Mapped[Optional[str]] = mapped_column(default='original')  # e.g., 'original', 'flagged', 'cleaned', 'deleted'
+    issue_description: Mapped[Optional[str]] = mapped_column(Text)  # Description of issues found
+    created_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now(), **_updated_at_options)
+    
+    # Loaded for a whole result set with one SELECT ... IN query
+    batch: Mapped["BatchInfo"] = relationship(back_populates="lots", lazy="selectin")
+    
     def __repr__(self):
         return f"<LotInfo(id='{self.id}', lot_name='{self.lot_name}', batch_id='{self.batch_id}')>"
 
@@ -104,29 +159,80 @@ class LotInfo(Base):
 class RuleApplication(Base):
     """Model for tracking rule applications."""
     __tablename__ = 'rule_applications'
+    __table_args__ = (
+        # Covers the usage statistics computed for CleaningRule below
+        Index('ix_ruleapp_rule_success', 'rule_id', 'success', 'applied_at'),
+    )
+    
+    application_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, index=True)
+    rule_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('cleaning_rules.rule_id'))
+    batch_id: Mapped[str] = mapped_column()
+    applied_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now())
+    success: Mapped[Optional[bool]] = mapped_column(default=True)
+    changes_made: Mapped[Optional[int]] = mapped_column(default=0)
     
-    application_id = Column(String, primary_key=True, index=True)
-    rule_id = Column(String, ForeignKey('cleaning_rules.rule_id'), nullable=False)
-    batch_id = Column(String, nullable=False)
-    applied_at = Column(DateTime, default=func.now())
-    success = Column(Boolean, default=True)
-    changes_made = Column(Integer, default=0)
-
     def __repr__(self):
         return f"<RuleApplication(application_id='{self.application_id}', rule_id='{self.rule_id}', batch_id='{self.batch_id}')>"
 
 
+# Rule usage statistics are derived from the application history instead of
+# counters stored on the rule, so recording an application is a plain INSERT
+# and concurrent cleanings never contend for the same cleaning_rules row
+def _rule_applications_scalar(expression):
+    return (
+        select(expression)
+        .where(RuleApplication.rule_id == CleaningRule.rule_id)
+        .correlate_except(RuleApplication)
+        .scalar_subquery()
+    )
+
+CleaningRule.usage_count = column_property(  # Number of times used
+    _rule_applications_scalar(func.count(RuleApplication.application_id))
+)
+CleaningRule.success_rate = column_property(  # Success rate percentage
+    _rule_applications_scalar(func.coalesce(func.avg(case((RuleApplication.success == True, 100.0), else_=0.0)), 0.0))
+)
+CleaningRule.last_used = column_property(  # Last usage timestamp
+    _rule_applications_scalar(func.max(RuleApplication.applied_at))
+)
+
+
 class ClientTemplate(Base):
     """Model for storing client-specific rule templates."""
     __tablename__ = 'client_templates'
     
-    template_id = Column(String, primary_key=True, index=True)
-    client_name = Column(String, nullable=False, index=True)
-    template_name = Column(String, nullable=False)
-    template_rules = Column(Text, nullable=False)  # JSON string of rule IDs
-    created_at = Column(DateTime, default=func.now())
-    is_active = Column(Boolean, default=True)
-
+    template_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, index=True)
+    client_name: Mapped[str] = mapped_column(index=True)
+    template_name: Mapped[str] = mapped_column()
+    template_rules: Mapped[Any] = mapped_column(JSONType, nullable=False)  # JSON list of rule IDs
+    rule_count: Mapped[Optional[int]] = mapped_column(default=0)  # Number of rule IDs in template_rules
+    created_at: Mapped[datetime] = mapped_column(TimestampType, server_default=func.now())
+    is_active: Mapped[Optional[bool]] = mapped_column(default=True)
+    
     def __repr__(self):
         return f"<ClientTemplate(template_id='{self.template_id}', client_name='{self.client_name}', template_name='{self.template_name}')>"
 
+
+# The PostgreSQL updated_at trigger leaves an explicitly assigned value alone
+event.listen(Base.metadata, 'before_create', DDL(
+    "CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$ "
+    "BEGIN "
+    "IF NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at THEN NEW.updated_at = now(); END IF; "
+    "RETURN NEW; "
+    "END $$ LANGUAGE plpgsql"
+).execute_if(dialect='postgresql'))
+
+event.listen(Base.metadata, 'after_drop', DDL(
+    "DROP FUNCTION IF EXISTS set_updated_at()"
+).execute_if(dialect='postgresql'))
+
+
+def _track_updated_at(table):
+    """Install the PostgreSQL updated_at trigger on table when it is created"""
+    event.listen(table, 'after_create', DDL(
+        f"CREATE TRIGGER trg_{table.name}_updated_at BEFORE UPDATE ON {table.name} "
+        f"FOR EACH ROW EXECUTE PROCEDURE set_updated_at()"
+    ).execute_if(dialect='postgresql'))
+
+for _model in (CattleRecord, CleaningRule, LotInfo):
+    _track_updated_at(_model.__table__)
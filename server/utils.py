@@ -4,14 +4,15 @@ DataHerd Server Utilities
 This module contains utility functions for the DataHerd server.
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from config.config import SQLALCHEMY_DATABASE_URI
+import functools
 import logging
+import time
 
-engine = create_engine(SQLALCHEMY_DATABASE_URI)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Share the engine and session factory from db.base so the server and the
+# dataherd modules draw connections from a single pool
+from db.base import engine, SessionLocal
 
 
 def get_db():
@@ -25,15 +26,31 @@ def get_db():
         db.close()
 
 
+# Seconds for which a successful connection check is reused
+DB_CHECK_TTL = 5
+
+
+@functools.lru_cache(maxsize=1)
+def _ping_database(time_bucket: int) -> bool:
+    """
+    Run SELECT 1 on a pooled connection; cached per time bucket.
+    
+    Failures raise and are therefore never cached, so the next call retries.
+    """
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return True
+
+
 def check_and_initialize_db():
     """
     Check and initialize database if needed.
     """
     try:
-        # Test database connection
-        with engine.connect() as connection:
-            logging.info("Database connection successful")
-            return True
+        # Test database connection, reusing a successful result for DB_CHECK_TTL seconds
+        _ping_database(int(time.monotonic() // DB_CHECK_TTL))
+        logging.info("Database connection successful")
+        return True
     except Exception as e:
         logging.error(f"Database connection failed: {e}")
         return False
@@ -9,6 +9,7 @@ This script provides a unified way to start the DataHerd application.
 import os
 import sys
 import argparse
+import hashlib
 import logging
 from pathlib import Path
 
@@ -19,10 +20,8 @@ sys.path.insert(0, str(project_root))
 # Set PYTHONPATH environment variable as well
 os.environ['PYTHONPATH'] = str(project_root) + os.pathsep + os.environ.get('PYTHONPATH', '')
 
-# Now import other modules
-from db.init_db import initialize_database
-from api_server.api_router import create_app
-import uvicorn
+# The database, API and server modules are imported inside the functions that
+# use them so argument parsing and environment checks run without loading them
 
 
 def setup_logging(log_level="INFO"):
@@ -34,19 +33,21 @@ def setup_logging(log_level="INFO"):
     )
 
 
+# Environment variables that must be set before the server can start
+REQUIRED_ENV_VARS = frozenset({'OPENAI_API_KEY'})
+
+
+def validate_env(required: frozenset = REQUIRED_ENV_VARS) -> frozenset:
+    """Return the required environment variables that are unset or empty."""
+    return frozenset(name for name in required if not os.environ.get(name))
+
+
 def check_environment():
     """Check if all required environment variables are set."""
-    required_vars = [
-        'OPENAI_API_KEY',
-    ]
-    
-    missing_vars = []
-    for var in required_vars:
-        if not os.getenv(var):
-            missing_vars.append(var)
+    missing_vars = validate_env()
     
     if missing_vars:
-        print(f"Missing required environment variables: {', '.join(missing_vars)}")
+        print(f"Missing required environment variables: {', '.join(sorted(missing_vars))}")
         print("Please check your .env file or set these variables.")
         return False
     
@@ -58,6 +59,7 @@ def init_database():
     """Initialize the database."""
     print("Initializing database...")
     try:
+        from db.init_db import initialize_database
         initialize_database()
         print("Database initialized successfully")
         return True
@@ -66,51 +68,95 @@ def init_database():
         return False
 
 
+def _frontend_build_hash(frontend_dir):
+    """BLAKE2 digest of the dependency manifests the frontend build depends on."""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in ("package.json", "package-lock.json"):
+        manifest = frontend_dir / name
+        if manifest.exists():
+            digest.update(manifest.read_bytes())
+    return digest.hexdigest()
+
+
+def _frontend_sources_mtime(frontend_dir):
+    """Latest modification time of the files that go into the frontend build."""
+    sources = [frontend_dir / "index.html"]
+    for source_dir in ("src", "public"):
+        sources.extend(frontend_dir.glob(f"{source_dir}/**/*"))
+    return max((p.stat().st_mtime for p in sources if p.is_file()), default=0)
+
+
 def build_frontend():
     """Build the frontend if needed."""
     frontend_dir = project_root / "dataherd-frontend"
     dist_dir = frontend_dir / "dist"
+    build_hash_file = dist_dir / ".buildhash"
     
     if not frontend_dir.exists():
         print("Frontend directory not found, skipping frontend build")
         return True
     
-    if dist_dir.exists():
+    # The build is current when it was made from the same manifests and no
+    # source file has changed since the hash file was written
+    build_hash = _frontend_build_hash(frontend_dir)
+    if (build_hash_file.exists()
+            and build_hash_file.read_text().strip() == build_hash
+            and _frontend_sources_mtime(frontend_dir) <= build_hash_file.stat().st_mtime):
         print("Frontend already built")
         return True
     
     print("Building frontend...")
     try:
         import subprocess
-        result = subprocess.run(
+        # Stream the build log instead of holding all of it in memory
+        process = subprocess.Popen(
             ["npm", "run", "build"],
             cwd=frontend_dir,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True
         )
+        for line in process.stdout:
+            print(f"  {line}", end="")
+        returncode = process.wait()
         
-        if result.returncode == 0:
+        if returncode == 0:
+            build_hash_file.write_text(build_hash)
             print("Frontend built successfully")
             return True
         else:
-            print(f"Frontend build failed: {result.stderr}")
+            print(f"Frontend build failed with exit code {returncode}")
             return False
     except Exception as e:
         print(f"Frontend build error: {e}")
         return False
 
 
-def start_server(host="0.0.0.0", port=9000, reload=False):
+def start_server(host="0.0.0.0", port=9000, reload=False, workers=None):
     """Start the DataHerd server."""
-    print(f"Starting DataHerd server on {host}:{port}")
+    # The reloader supervises a single process; otherwise use one worker per
+    # CPU unless told otherwise
+    if reload:
+        workers = 1
+    elif workers is None:
+        workers = os.cpu_count() or 1
+    
+    print(f"Starting DataHerd server on {host}:{port} with {workers} worker(s)")
     
-    app = create_app()
+    import uvicorn
     
+    # The app is passed as a factory import string so every worker process
+    # builds its own instance; "auto" picks uvloop and httptools when they
+    # are installed (uvicorn[standard]) and falls back to asyncio and h11
     uvicorn.run(
-        app,
+        "api_server.api_router:create_app",
+        factory=True,
         host=host,
         port=port,
         reload=reload,
+        workers=workers,
+        loop="auto",
+        http="auto",
         log_level="info"
     )
 
@@ -121,6 +167,8 @@ def main():
     parser.add_argument("--host", type=str, default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--port", type=int, default=9000, help="Port to bind to")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload for development")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: CPU count, 1 with --reload)")
     parser.add_argument("--skip-db-init", action="store_true", help="Skip database initialization")
     parser.add_argument("--skip-frontend", action="store_true", help="Skip frontend build")
     parser.add_argument("--log-level", type=str, default="INFO", help="Log level")
@@ -149,7 +197,7 @@ def main():
     
     # Start server
     try:
-        start_server(args.host, args.port, args.reload)
+        start_server(args.host, args.port, args.reload, args.workers)
     except KeyboardInterrupt:
         print("\nDataHerd server stopped")
     except Exception as e:
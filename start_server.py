@@ -6,16 +6,18 @@ import os
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
-# Import and run the server
-from api_server.api_router import run_api, create_app
 import argparse
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument("--host", type=str, default="0.0.0.0")
     parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--workers", type=int, default=1)
     
     args = parser.parse_args()
     
-    app = create_app()
-    run_api(host=args.host, port=args.port)
\ No newline at end of file
+    # Import the server only after the arguments are parsed so --help and
+    # invalid arguments do not pay for loading the API stack
+    from api_server.api_router import run_api
+    
+    run_api(host=args.host, port=args.port, workers=args.workers)
\ No newline at end of file